@@ -1,75 +1,157 @@
 import os
 import csv
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+import re
+import asyncio
+import httpx
+from urllib.parse import urljoin
 from langdetect import detect
 
+# Prefer the Lexbor-based selectolax parser; fall back to BeautifulSoup if missing
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+    from bs4 import BeautifulSoup
+
+    # Prefer the C-based lxml parser; fall back to the pure-Python one if missing
+    try:
+        import lxml
+        HTML_PARSER = "lxml"
+    except ImportError:
+        HTML_PARSER = "html.parser"
+
+
+def parse_page(html):
+    # Return the page text and the raw href of every link on the page
+    if LexborHTMLParser is not None:
+        tree = LexborHTMLParser(html)
+        # A bare <a href> has a None value here; BeautifulSoup reports it as "" like href=""
+        hrefs = [a.attributes["href"] or "" for a in tree.css("a[href]")]
+        # Drop script/style contents so the text is only what the page shows
+        for element in tree.css("script, style"):
+            element.decompose()
+        return tree.text(separator=" ", strip=True), hrefs
+
+    soup = BeautifulSoup(html, HTML_PARSER)
+    hrefs = [a["href"] for a in soup.find_all("a", href=True)]
+    for element in soup.find_all(["script", "style"]):
+        element.decompose()
+    return soup.get_text(" ", strip=True), hrefs
+
 class WebCrawler:
-    def __init__(self, seed_url, domain, max_pages=50):
+    def __init__(self, seed_url, domain, max_pages=50, concurrency=20):
         self.seed_url = seed_url
         self.domain = domain
+        # http(s) URLs on the domain itself or any of its subdomains (www.cnn.com, edition.cnn.com, ...),
+        # optionally with an explicit port
+        self.url_pattern = re.compile(rf"https?://([^/?#]*\.)?{re.escape(domain)}(:\d+)?([/?#]|$)", re.IGNORECASE)
         self.visited = set()
+        self.enqueued = set()
         self.report = []
         self.max_pages = max_pages
+        self.concurrency = concurrency
 
         # Create a separate repository folder for this domain
         self.repo_path = os.path.join("repository", self.domain.replace(".", "_"))
         os.makedirs(self.repo_path, exist_ok=True)
 
     def valid_url(self, url):
-        parsed_url = urlparse(url)
-        return parsed_url.scheme in ["http", "https"] and self.domain in parsed_url.netloc
+        return self.url_pattern.match(url) is not None
 
-    def crawl(self):
+    async def crawl(self):
         print(f"\n🌍 Starting crawl for domain: {self.domain}")
-        to_crawl = [self.seed_url]
-        
-        while to_crawl and len(self.visited) < self.max_pages:
-            url = to_crawl.pop(0).split("#")[0]
-            if url in self.visited or not self.valid_url(url):
-                continue
-            
-            try:
-                print(f"Crawling: {url}")
-                response = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-                response.raise_for_status()
-                response.encoding = "utf-8" # Assume content of page is in UTF-8
-                soup = BeautifulSoup(response.text, "html.parser")
-
-                # Detect page language
-                try:
-                    lang = detect(soup.get_text())
-                except:
-                    lang = "unknown"
-
-                # Save full HTML content in the domain-specific folder
-                filename = os.path.join(self.repo_path, f"page_{len(self.visited)}.html")
-                with open(filename, "w", encoding="utf-8") as file:
-                    file.write(response.text)
-                
-                print(f"Saved: {filename}")
-
-                # Find all outlinks
-                links = set(urljoin(url, a['href']) for a in soup.find_all("a", href=True))
-                links = {link for link in links if self.valid_url(link)}
-
-                # Store the URL and number of outlinks
-                self.report.append((url, len(links), lang, filename))
-
-                # Mark the page as visited
-                self.visited.add(url)
-                
-                # Add new links to the queue
-                to_crawl.extend(links - self.visited)
-
-            except requests.RequestException as e:
-                print(f"Failed to crawl {url}: {e}")
-                continue
+        to_crawl = asyncio.Queue()
+        # The seed goes through the same checks as discovered links
+        seed_url = self.seed_url.split("#")[0]
+        if self.valid_url(seed_url):
+            to_crawl.put_nowait(seed_url)
+            self.enqueued.add(seed_url)
+        else:
+            print(f"Seed URL {self.seed_url} is outside {self.domain}; nothing to crawl")
+        lock = asyncio.Lock()
+
+        # Keep up to `concurrency` pooled (HTTP/2 multiplexed) requests in flight
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        transport = httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=3)
+        async with httpx.AsyncClient(transport=transport, timeout=10, follow_redirects=True,
+                                     headers={"User-Agent": "Mozilla/5.0"}) as client:
+            workers = [asyncio.create_task(self.worker(client, to_crawl, lock)) for _ in range(self.concurrency)]
+            await to_crawl.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
 
         self.save_report()
         print(f"🚀 Finished crawling {self.domain}. Pages visited: {len(self.visited)}")
 
+    async def worker(self, client, to_crawl, lock):
+        while True:
+            url = await to_crawl.get()
+            try:
+                await self.crawl_page(client, to_crawl, lock, url)
+            except Exception as e:
+                # Keep the worker alive; a dead worker would leave to_crawl.join() waiting forever
+                print(f"Failed to crawl {url}: {e!r}")
+            finally:
+                to_crawl.task_done()
+
+    async def crawl_page(self, client, to_crawl, lock, url):
+        # Every queued URL is unique and valid, so only the page cap needs checking
+        if len(self.visited) >= self.max_pages:
+            return
+
+        try:
+            print(f"Crawling: {url}")
+            response = await client.get(url)
+            response.raise_for_status()
+            # Parse the raw bytes directly; no decoded copy of the page is kept
+            text, hrefs = parse_page(response.content)
+        except httpx.HTTPError as e:
+            print(f"Failed to crawl {url}: {e}")
+            return
+
+        # Detect page language from the first 4000 characters of text. This relies on parse_page
+        # having removed script/style, otherwise the sample is mostly inline JS and misdetects
+        try:
+            lang = detect(text[:4000])
+        except:
+            lang = "unknown"
+
+        # Find all outlinks: join each href once and check scheme and domain in one regex match
+        links = set()
+        for href in hrefs:
+            try:
+                link = urljoin(url, href)
+            except ValueError:
+                # Malformed href such as "http://[bad"; skip just this link
+                continue
+            if self.valid_url(link):
+                links.add(link)
+
+        async with lock:
+            if len(self.visited) >= self.max_pages:
+                return
+
+            # Save full HTML content in the domain-specific folder
+            filename = os.path.join(self.repo_path, f"page_{len(self.visited)}.html")
+            with open(filename, "wb") as file:
+                file.write(response.content)
+
+            print(f"Saved: {filename}")
+
+            # Store the URL and number of outlinks
+            self.report.append((url, len(links), lang, filename))
+
+            # Mark the page as visited
+            self.visited.add(url)
+
+            # Add new links to the queue, skipping any URL that was already queued
+            for link in links:
+                link = link.split("#")[0]
+                if link not in self.enqueued:
+                    self.enqueued.add(link)
+                    to_crawl.put_nowait(link)
+
     def save_report(self):
         # Save the crawling report to a single report.csv file
         with open("report.csv", "a", newline="", encoding="utf-8") as file:
@@ -94,4 +176,4 @@ if __name__ == "__main__":
     # Start separate crawlers for each domain
     for url, domain in zip(seed_urls, domain_restrictions):
         crawler = WebCrawler(url, domain, max_pages=50)
-        crawler.crawl()
+        asyncio.run(crawler.crawl())
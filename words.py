@@ -1,10 +1,39 @@
-from bs4 import BeautifulSoup
 import csv
+from collections import defaultdict
+from collections.abc import Callable
+import functools
+import importlib.metadata
+import multiprocessing
+import os
+import re
 import nltk
-from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import SnowballStemmer
 
+# Prefer PyStemmer's C Snowball stemmers; fall back to NLTK's pure-Python ones if missing.
+# PyStemmer 3+ bundles newer Snowball rules that stem many words differently from NLTK, so only
+# 2.x is used; its output is near-identical to NLTK's (a handful of rare words still differ).
+try:
+    import Stemmer
+    if int(importlib.metadata.version("PyStemmer").split(".")[0]) >= 3:
+        Stemmer = None
+except ImportError:
+    Stemmer = None
+
+# Prefer the Lexbor-based selectolax parser; fall back to BeautifulSoup if missing
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+    from bs4 import BeautifulSoup
+
+    # Prefer the C-based lxml parser; fall back to the pure-Python one if missing
+    try:
+        import lxml
+        HTML_PARSER = "lxml"
+    except ImportError:
+        HTML_PARSER = "html.parser"
+
 LANGUAGE_MAPPING = {
     "en": "english",
     "es": "spanish",
@@ -13,7 +42,9 @@ LANGUAGE_MAPPING = {
     "de": "german"
 }
 
-SYMBOLS = {"|", "-", ",", ".", "+", ":", "?", "!", '"', "'", "(", ")", "[", "]", "...", "$", "‘", "&", "“", "–", "„", "©", "«", "»", "’", "”", "/", "•", "™", "--", "#", "%"}
+# Words start with a letter and may join parts with apostrophes or hyphens ("don't", "covid-19"),
+# so punctuation and bare numbers never become tokens
+WORD_PATTERN = re.compile(r"[^\W\d_]\w*(?:['-]\w+)*")
 
 
 def map_language(lang: str) -> str:
@@ -25,35 +56,86 @@ def map_language(lang: str) -> str:
     return language
 
 
+@functools.lru_cache(maxsize=None)
+def _get_stopwords(language: str) -> frozenset[str]:
+    return frozenset(stopwords.words(language))
+
+
+def extract_text(contents: bytes) -> str:
+    # Parse the HTML and return its text without script and style contents.
+    # Text nodes are joined with spaces so adjacent elements don't fuse into one word.
+    if LexborHTMLParser is not None:
+        tree = LexborHTMLParser(contents)
+        for element in tree.css("script, style"):
+            element.decompose()
+        return tree.text(separator=" ")
+
+    soup = BeautifulSoup(contents, HTML_PARSER)
+    for element in soup.find_all(["script", "style"]):
+        element.decompose()
+    return soup.get_text(" ")
+
+
 def tokenize_document(filename: str, language: str) -> list[str]:
-    # Read file and parse with BeautifulSoup
-    with open(filename, "r", encoding="utf-8") as f:
+    # Hand the parser the raw bytes; it decodes while building the tree
+    with open(filename, "rb") as f:
         contents = f.read()
-        soup = BeautifulSoup(contents, "html.parser")
 
-    # Remove unnecessary elements
-    for element in soup.find_all(["script", "style", ""]):
-        element.decompose()
-    
-    text = soup.get_text().lower()
-    stop_words = stopwords.words(language)
-    tokens = word_tokenize(text, language=language)
-    filtered_tokens = list(filter(lambda x: x not in stop_words and x not in SYMBOLS, tokens))
+    text = extract_text(contents)
+    stop_words = _get_stopwords(language)
+    # Lowercase matched words only, rather than copying the whole document
+    tokens = (token.lower() for token in WORD_PATTERN.findall(text))
+    filtered_tokens = [token for token in tokens if token not in stop_words and len(token) > 1]
     return filtered_tokens
     
     
+@functools.lru_cache(maxsize=None)
+def _get_stemmer(language: str) -> SnowballStemmer:
+    return SnowballStemmer(language)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_stem(language: str) -> Callable[[str], str]:
+    # Words repeat heavily across documents, so memoize stems for the life of the process
+    return functools.lru_cache(maxsize=200_000)(_get_stemmer(language).stem)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_c_stemmer(language: str) -> "Stemmer.Stemmer":
+    stemmer = Stemmer.Stemmer(language)
+    stemmer.maxCacheSize = 200_000
+    return stemmer
+
+
 def stem_tokens(tokens: list[str], language: str) -> list[str]:
-    stemmer = SnowballStemmer(language)
-    return [stemmer.stem(word) for word in tokens]
+    if Stemmer is not None:
+        # Stem the whole document in one call into C
+        return _get_c_stemmer(language).stemWords(tokens)
+
+    stem = _get_stem(language)
+    return [stem(word) for word in tokens]
+
+
+def preload_resources():
+    # Load every mapped language's stopwords and stemmer up front, in the parent process, so a
+    # missing corpus stops the run here; forked pool workers then start with warm caches
+    for language in LANGUAGE_MAPPING.values():
+        _get_stopwords(language)
+        if Stemmer is not None:
+            _get_c_stemmer(language)
+        else:
+            _get_stem(language)
+
+
+def process_row(row: list[str]) -> list[str]:
+    # Tokenize and stem one report.csv row's document (runs in a worker process)
+    url, outlinks, lang, filename = row
+    language = map_language(lang)
+    tokens = tokenize_document(filename, language)
+    return stem_tokens(tokens, language)
 
 
 def nltk_download():
-    print("Checking for tokenizers/punkt data...")
-    try:
-        nltk.data.find("tokenizers/punkt")
-    except LookupError:
-        nltk.download("punkt")
-    
     print("Checking for corpora/stopwords data...")
     try:
         nltk.data.find("corpora/stopwords")
@@ -69,34 +151,39 @@ if __name__ == "__main__":
         print(f"Could not open report.csv: {e}")
         exit(1)
     nltk_download()
+    preload_resources()
 
     report_header = next(report_csv)
+    rows = list(report_csv)
+    report.close()
+
+    # Each site's combined words.txt stays open and is appended to as pages are processed
     sites = {}
-    for url, outlinks, lang, filename in report_csv:
-        # Tokenize and stem document to get words
-        print(f"Tokenizing {filename} ({lang}): ", end="")
-        language = map_language(lang)
-        tokens = tokenize_document(filename, language)
-        stems = stem_tokens(tokens, language)
-
-        # Write words to file
-        words_filename = filename.replace(".html", "-words.txt")
-        with open(words_filename, "w") as f:
-            f.write("\n".join(stems))
-            print(len(stems))
-
-        # Add words to accumulator
-        site = "/".join(filename.split("/")[:-1])
-        if site not in sites:
-            sites[site] = []
-        sites[site] += stems
-    
-    # Write words from each site to file
-    for site, tokens in sites.items():
-        print(f"{site} word count: {len(tokens)}")
-        words_filename = f"{site}/words.txt"
-        with open(words_filename, "w") as f:
-            f.write("\n".join(tokens))
-    
+    word_counts = defaultdict(int)
+    try:
+        with multiprocessing.Pool(processes=os.cpu_count()) as pool:
+            # Documents are tokenized and stemmed in parallel; results come back in report order
+            for (url, outlinks, lang, filename), stems in zip(rows, pool.imap(process_row, rows, chunksize=8)):
+                print(f"Tokenizing {filename} ({lang}): ", end="")
+
+                # Write words to file
+                words_filename = filename.replace(".html", "-words.txt")
+                with open(words_filename, "w") as f:
+                    f.writelines(stem + "\n" for stem in stems)
+                    print(len(stems))
+
+                # Add words to the site's file
+                site = os.path.dirname(filename)
+                if site not in sites:
+                    sites[site] = open(f"{site}/words.txt", "w")
+                sites[site].writelines(stem + "\n" for stem in stems)
+                word_counts[site] += len(stems)
+    finally:
+        for f in sites.values():
+            f.close()
+
+    for site, count in word_counts.items():
+        print(f"{site} word count: {count}")
+
     print("Done!")
 